@@ -1,5 +1,6 @@
 import os
 import re
+import time
 import sqlite3
 import uuid
 from io import BytesIO
@@ -7,12 +8,15 @@ from datetime import datetime
 
 import streamlit as st
 import google.generativeai as genai
-from PyPDF2 import PdfReader
+from PyPDF2 import PdfReader, PdfWriter
 import docx
 
+import ocr
+
 # Configuration 
 DB_PATH = "feedback.db"
 MODEL_NAME = "gemini-2.5-flash"  
+OCR_MIN_CHARS = 10  # pages with less extractable text than this are treated as image-only
 
 # API Key 
 API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -95,13 +99,100 @@ def get_last_feedback(email, university, program):
     return row if row else (None, None, None)
 
 # Document extraction
+def _single_page_pdf(page):
+    writer = PdfWriter()
+    writer.add_page(page)
+    buf = BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+def _split_pdf(uploaded_file):
+    """
+    Read the text layer of a PDF and pick out pages that need OCR.
+    Returns (pages, image_pages, ocr_report): per-page text, {page index: single-page PDF bytes},
+    and a report dict (None if every page has a text layer) with 'pages' (1-based numbers
+    whose text came from OCR), 'blank' (OCR found no text), 'failed' ({page number: reason}),
+    'seconds' and 'available'.
+    """
+    reader = PdfReader(uploaded_file)
+    pages = []
+    image_pages = {}
+    report = {"pages": [], "blank": [], "failed": {}, "seconds": 0.0, "available": ocr.OCR_AVAILABLE}
+    for i, p in enumerate(reader.pages):
+        text = p.extract_text() or ""
+        pages.append(text)
+        if len(text.strip()) >= OCR_MIN_CHARS:
+            continue
+        if not ocr.OCR_AVAILABLE:
+            report["failed"][i + 1] = "OCR not installed"
+            continue
+        try:
+            image_pages[i] = _single_page_pdf(p)
+        except Exception as e:
+            report["failed"][i + 1] = f"could not split page: {e}"
+
+    if not (image_pages or report["failed"]):
+        report = None
+    return pages, image_pages, report
+
+def extract_documents(uploaded_files):
+    """
+    Extract text from several uploads, given as {label: UploadedFile}.
+    Image-only PDF pages from all documents go through a single OCR batch, so the whole
+    upload shares one OCR deadline. Text-layer pages are kept even if OCR fails.
+    Returns {label: (text, ocr_report)}.
+    """
+    results = {}
+    pdfs = {}
+    jobs = {}
+    for label, uploaded_file in uploaded_files.items():
+        if not (uploaded_file and uploaded_file.name.lower().endswith(".pdf")):
+            results[label] = extract_text(uploaded_file)
+            continue
+        uploaded_file.seek(0)
+        try:
+            pages, image_pages, report = _split_pdf(uploaded_file)
+        except Exception:
+            results[label] = ("", None)
+            continue
+        pdfs[label] = (pages, report)
+        for i, data in image_pages.items():
+            jobs[(label, i)] = data
+
+    if jobs:
+        start = time.perf_counter()
+        try:
+            ocr_results, ocr_failed = ocr.ocr_pages(jobs)
+        except Exception as e:
+            ocr_results, ocr_failed = {}, {key: f"OCR error: {e}" for key in jobs}
+        seconds = time.perf_counter() - start
+
+        for (label, i), reason in ocr_failed.items():
+            pdfs[label][1]["failed"][i + 1] = reason
+        for (label, i), text in ocr_results.items():
+            pages, report = pdfs[label]
+            if not text.strip():
+                report["blank"].append(i + 1)
+            elif len(text.strip()) > len(pages[i].strip()):
+                pages[i] = text
+                report["pages"].append(i + 1)
+        for label in {label for label, _ in jobs}:
+            pdfs[label][1]["seconds"] = seconds
+
+    for label, (pages, report) in pdfs.items():
+        if report:
+            report["pages"].sort()
+            report["blank"].sort()
+        results[label] = ("\n".join(pages).strip(), report)
+    return results
+
 def extract_text(uploaded_file):
     """
     Extract text from PDF, DOCX, or TXT file-like object (Streamlit UploadedFile).
-    Returns plain string.
+    Returns (text, ocr_report); ocr_report is only set for PDFs with image-only pages.
     """
     if not uploaded_file:
-        return ""
+        return "", None
 
     name = uploaded_file.name.lower()
     uploaded_file.seek(0)
@@ -110,30 +201,52 @@ def extract_text(uploaded_file):
     if name.endswith(".docx"):
         try:
             doc = docx.Document(BytesIO(uploaded_file.read()))
-            return "\n".join([p.text for p in doc.paragraphs]).strip()
+            return "\n".join([p.text for p in doc.paragraphs]).strip(), None
         except Exception:
-            return ""
+            return "", None
 
     # PDF
     if name.endswith(".pdf"):
-        try:
-            reader = PdfReader(uploaded_file)
-            pages = []
-            for p in reader.pages:
-                pages.append(p.extract_text() or "")
-            return "\n".join(pages).strip()
-        except Exception:
-            return ""
+        return extract_documents({"document": uploaded_file})["document"]
 
     # TXT or fallback
     try:
         uploaded_file.seek(0)
         raw = uploaded_file.read()
         if isinstance(raw, bytes):
-            return raw.decode("utf-8", errors="ignore")
-        return str(raw)
+            return raw.decode("utf-8", errors="ignore"), None
+        return str(raw), None
     except Exception:
-        return ""
+        return "", None
+
+def show_ocr_report(label, report):
+    if not report:
+        return
+    if not report["available"]:
+        pages = ", ".join(str(n) for n in sorted(report["failed"]))
+        st.warning(f"⚠️ {label}: page(s) {pages} have no text layer and OCR is not installed (tesseract + poppler). Those pages were skipped.")
+        return
+    if report["pages"]:
+        pages = ", ".join(str(n) for n in report["pages"])
+        st.info(f"🔍 {label}: OCR'd page(s) {pages} in {report['seconds']:.1f}s.")
+    if report["blank"]:
+        pages = ", ".join(str(n) for n in report["blank"])
+        st.caption(f"{label}: no text on page(s) {pages}.")
+    if report["failed"]:
+        failed = ", ".join(f"{n} ({reason})" for n, reason in sorted(report["failed"].items()))
+        st.warning(f"⚠️ {label}: OCR failed for page(s) {failed}. Those pages were skipped.")
+
+def empty_document_reason(report):
+    """
+    Explain why a document came back with no text, based on its OCR report.
+    """
+    if not report:
+        return "the file could not be parsed or contains no text"
+    if not report["available"]:
+        return "it has no text layer and OCR is not installed"
+    if report["failed"]:
+        return "OCR failed on its scanned pages"
+    return "its pages appear to be blank"
 
 # Prompt builders
 def build_initial_prompt(university_name, program_name, resume_text, sop_text, lor_text):
@@ -575,13 +688,21 @@ if st.button("🚀 Analyze / Re-evaluate"):
 
        
         with st.spinner("Extracting text from uploaded files..."):
-            resume_text = extract_text(resume_file)
-            sop_text = extract_text(sop_file)
-            lor_text = extract_text(lor_file)
+            docs = extract_documents({"Resume": resume_file, "SOP": sop_file, "LOR": lor_file})
+        resume_text = docs["Resume"][0]
+        sop_text = docs["SOP"][0]
+        lor_text = docs["LOR"][0]
+
+        for label, (_, report) in docs.items():
+            show_ocr_report(label, report)
+
+        empty_docs = [f"{label} ({empty_document_reason(report)})" for label, (text, report) in docs.items() if not text.strip()]
 
         prev_resume, prev_sop, prev_lor = get_last_feedback(email_norm, university_name.strip(), program_name.strip())
 
-        if not any([prev_resume, prev_sop, prev_lor]):
+        if empty_docs:
+            st.error(f"No text could be extracted from: {'; '.join(empty_docs)}. Please fix or re-upload and try again.")
+        elif not any([prev_resume, prev_sop, prev_lor]):
             # initial analysis
             st.info("Running initial analysis with Gemini...")
             prompt = build_initial_prompt(university_name.strip(), program_name.strip(), resume_text, sop_text, lor_text)
@@ -0,0 +1,154 @@
+import os
+import shutil
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# OCR engine is optional: pytesseract + pdf2image need the tesseract and poppler binaries installed
+try:
+    import pytesseract
+    from pdf2image import convert_from_bytes
+except ImportError:
+    pytesseract = None
+
+
+def _check_ocr_available():
+    if pytesseract is None or not shutil.which("pdftoppm"):
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+OCR_AVAILABLE = _check_ocr_available()
+
+# Configuration
+OCR_MAX_WORKERS = max(1, int(os.getenv("OCR_MAX_WORKERS", "2")))
+OCR_DPI = 300
+OCR_PAGE_TIMEOUT = 60    # seconds, enforced inside the worker for rendering and for tesseract
+OCR_TOTAL_TIMEOUT = int(os.getenv("OCR_TOTAL_TIMEOUT", "180"))  # seconds, deadline for a whole ocr_pages() call
+OCR_CACHE_SIZE = 256     # pages
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def page_hash(page_pdf_bytes):
+    return hashlib.sha256(page_pdf_bytes).hexdigest()
+
+
+def _ocr_page(page_pdf_bytes):
+    """
+    Worker: render a single-page PDF to an image and run tesseract on it.
+    Runs in a child process, so it must stay importable without Streamlit.
+    Both calls take a timeout so a hung page cannot hold a worker forever.
+    """
+    images = convert_from_bytes(page_pdf_bytes, dpi=OCR_DPI, timeout=OCR_PAGE_TIMEOUT)
+    return "\n".join(pytesseract.image_to_string(img, timeout=OCR_PAGE_TIMEOUT) for img in images).strip()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the Streamlit server is multi-threaded, forking it is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool(broken):
+    """
+    Drop the shared pool if it is still the given one, so the next call starts fresh workers.
+    Used after a crash, and after a deadline so stuck workers don't starve later calls.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _cache_put(key, text):
+    with _cache_lock:
+        _cache[key] = text
+        _cache.move_to_end(key)
+        while len(_cache) > OCR_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def ocr_pages(pages):
+    """
+    OCR a batch of pages given as {page_key: single_page_pdf_bytes}; keys are opaque.
+    Cached pages are returned without touching the pool; the rest are OCR'd in parallel
+    under a single OCR_TOTAL_TIMEOUT deadline.
+    Returns (texts, failed): {page_key: text} and {page_key: reason}.
+    """
+    texts = {}
+    failed = {}
+    pending = {}
+    for num, data in pages.items():
+        key = page_hash(data)
+        cached = _cache_get(key)
+        if cached is not None:
+            texts[num] = cached
+        else:
+            pending[num] = (key, data)
+
+    if not pending:
+        return texts, failed
+
+    pool = _get_pool()
+    futures = {}
+    try:
+        for num, (key, data) in pending.items():
+            futures[pool.submit(_ocr_page, data)] = (num, key)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        for num in pending:
+            failed[num] = "OCR worker crashed"
+        return texts, failed
+
+    done, not_done = wait(futures, timeout=OCR_TOTAL_TIMEOUT)
+    broken = False
+    for fut in done:
+        num, key = futures[fut]
+        try:
+            text = fut.result()
+        except BrokenProcessPool:
+            broken = True
+            failed[num] = "OCR worker crashed"
+            continue
+        except Exception as e:
+            failed[num] = f"OCR error: {e}"
+            continue
+        _cache_put(key, text)
+        texts[num] = text
+
+    for fut in not_done:
+        num = futures[fut][0]
+        if fut.cancel():
+            failed[num] = f"not started before the {OCR_TOTAL_TIMEOUT}s deadline"
+        else:
+            failed[num] = f"timed out after {OCR_TOTAL_TIMEOUT}s"
+
+    if broken or not_done:
+        _reset_pool(pool)
+    return texts, failed